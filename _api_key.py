@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Google Maps API key lookup shared by the dcommute scripts.
+
+The key is taken from the GOOGLE_MAPS_API_KEY environment variable if set,
+otherwise it is read (once per process) from the service account key file.
+"""
+
+import functools
+import os
+from pathlib import Path
+
+KEY_FILE_PATH = Path("~/.gcloud/dcommute-service-account-key.json").expanduser()
+
+@functools.lru_cache(maxsize=1)
+def get_api_key():
+    """
+    Get the Google Maps API key.
+    
+    Returns:
+        The API key string
+        
+    Raises:
+        RuntimeError: If the key is not in the environment and the key file
+            can't be read
+    """
+    api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
+    if api_key:
+        return api_key
+    
+    try:
+        return KEY_FILE_PATH.read_text().strip()
+    except FileNotFoundError:
+        raise RuntimeError(f"API key file not found at {KEY_FILE_PATH}") from None
+    except OSError as e:
+        raise RuntimeError(f"Could not read API key file {KEY_FILE_PATH}: {e}") from e
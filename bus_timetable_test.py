@@ -3,25 +3,40 @@
 Oxford to London Bus Timetable Analysis Script
 
 This script analyzes the Oxford to London bus timetable and predicts arrival times 
-using the Google Directions API. It compares scheduled times with current traffic 
+using the Google Distance Matrix and Directions APIs. It compares scheduled times with current traffic 
 conditions to predict actual arrival times.
 
 Requirements:
-- Google Directions API key (set as environment variable GOOGLE_MAPS_API_KEY)
-- pip install googlemaps pandas tabulate
+- Google Directions API key (set as environment variable GOOGLE_MAPS_API_KEY,
+  or saved in ~/.gcloud/dcommute-service-account-key.json)
+- pip install aiohttp orjson tabulate
 
 Usage:
 1. Set your Google Maps API key: export GOOGLE_MAPS_API_KEY="your_api_key_here"
 2. Run: python bus_timetable_test.py
+
+Travel times are cached in ~/.cache/dcommute for 5-minute departure windows;
+pass --no-cache to always query the API.
 """
 
+import argparse
+import asyncio
+import hashlib
+import logging
 import os
-import googlemaps
-import pandas as pd
+import shelve
+import threading
+import aiohttp
+import orjson
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from tabulate import tabulate
 import time
 
+from _api_key import get_api_key
+
+log = logging.getLogger(__name__)
+
 # All stops on the Oxford to London route
 STOPS = [
     "Oxford Gloucester Green, Oxford, UK",
@@ -50,16 +65,218 @@ TIMETABLE = [
     "09:39"   # London Victoria Coach Station
 ]
 
+# Google Maps API endpoints
+DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+# Google Maps API quota (queries per second), concurrent connections and
+# per-request timeout (seconds)
+QPS_LIMIT = 50
+MAX_CONNECTIONS = 16
+REQUEST_TIMEOUT = 10
+
+# Largest Distance Matrix request allowed: origins or destinations per side,
+# and origins x destinations elements in total
+MAX_MATRIX_PLACES = 25
+MAX_MATRIX_ELEMENTS = 100
+
+# Connection errors, timeouts and these HTTP statuses are retried, with
+# exponential backoff
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Traffic estimates barely change within a few minutes, so cached travel times
+# are shared between departures in the same 5-minute bucket (and dropped once
+# the bucket has passed)
+CACHE_PATH = os.path.expanduser("~/.cache/dcommute/directions")
+CACHE_BUCKET_SECONDS = 300
+
+class ApiError(Exception):
+    """Google Maps API request failed or returned an error status."""
+
+class RateLimiter:
+    """Token bucket allowing up to `rate` calls per second across tasks and threads."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it."""
+        # The token is taken straight away; a negative balance is the queue of
+        # callers waiting for a refill
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
 class BusTimetableAnalyzer:
-    def __init__(self, api_key):
+    def __init__(self, api_key, use_cache=True):
         """Initialize with Google Maps API key."""
-        self.gmaps = googlemaps.Client(key=api_key)
+        self.api_key = api_key
+        self.rate_limiter = RateLimiter(QPS_LIMIT)
+        
+        # API requests currently being fetched, by key. These are shared by
+        # every caller, including ones on other threads and event loops
+        # (predict_route_times runs a new event loop per call)
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
         
-    def get_travel_time(self, origin, destination, departure_time=None):
+        self.cache = None
+        self.cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        if use_cache:
+            self.cache = self.open_cache()
+    
+    def open_cache(self):
+        """Open the travel time cache, dropping entries from past buckets."""
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        bucket = self.departure_bucket(datetime.now())
+        cache = shelve.open(CACHE_PATH)
+        current = {key: entry for key, entry in cache.items()
+                   if isinstance(entry, tuple) and entry[0] >= bucket}
+        if len(current) < len(cache):
+            # Rewrite the file rather than deleting keys, since dbm.dumb
+            # never shrinks its data file
+            cache.close()
+            cache = shelve.open(CACHE_PATH, flag='n')
+            cache.update(current)
+        return cache
+    
+    def close(self):
+        """Flush and close the travel time cache."""
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+    
+    def open_session(self):
+        """Open a keep-alive HTTP session to share across API calls."""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        )
+    
+    @staticmethod
+    def departure_bucket(departure_time):
+        """Number of the 5-minute cache bucket a departure time falls in."""
+        return round(departure_time.timestamp() / CACHE_BUCKET_SECONDS)
+    
+    def cache_key(self, origin, destination, departure_time):
+        """Build the cache key for a stop pair and departure time bucket."""
+        bucket = self.departure_bucket(departure_time)
+        return hashlib.blake2b(f"{origin}|{destination}|{bucket}".encode()).hexdigest()
+    
+    def cache_get(self, key):
+        """Return the cached travel time for key, or None if not cached."""
+        with self.cache_lock:
+            entry = self.cache.get(key)
+        return None if entry is None else entry[1]
+    
+    def cache_put(self, key, departure_time, travel_time):
+        """Cache a travel time, tagged with its bucket so it can expire."""
+        with self.cache_lock:
+            self.cache[key] = (self.departure_bucket(departure_time), travel_time)
+    
+    def record_cache_lookup(self, hit):
+        """Count a cache hit or miss for one API request."""
+        with self.cache_lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+    
+    async def coalesce(self, key, fetch):
+        """
+        Run fetch(), or if a request with the same key is already in flight
+        (in any thread or event loop) wait for its result instead.
+        
+        Args:
+            key: Identifies the request
+            fetch: Function returning the coroutine that makes the request
+            
+        Returns:
+            The result of the request
+        """
+        with self.inflight_lock:
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.inflight[key] = future
+        
+        if not owner:
+            # Shield so a cancelled waiter doesn't cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(future))
+        
+        try:
+            result = await fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.inflight_lock:
+                del self.inflight[key]
+    
+    async def get_json(self, session, url, params):
+        """
+        Call a Google Maps web service, retrying transient failures.
+        
+        Args:
+            session: aiohttp session to send the request with
+            url: API endpoint
+            params: Query parameters (the API key is added)
+            
+        Returns:
+            Decoded JSON response
+        """
+        params = {**params, 'key': self.api_key}
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            await self.rate_limiter.acquire()
+            
+            try:
+                async with session.get(url, params=params) as response:
+                    status = response.status
+                    body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Timeouts have no message, so fall back to the exception name
+                error = str(e) or type(e).__name__
+                continue
+            
+            if status in RETRY_STATUSES:
+                error = f"HTTP {status}"
+                continue
+            if status != 200:
+                raise ApiError(f"HTTP {status}")
+            
+            data = orjson.loads(body)
+            if data['status'] == 'OVER_QUERY_LIMIT':
+                error = data['status']
+                continue
+            if data['status'] not in ('OK', 'ZERO_RESULTS'):
+                raise ApiError(f"{data['status']}: {data.get('error_message', '')}")
+            return data
+        
+        raise ApiError(f"{error} (gave up after {MAX_RETRIES + 1} attempts)")
+        
+    async def get_travel_time(self, session, origin, destination, departure_time=None):
         """
         Get travel time between two stops using Google Directions API.
         
         Args:
+            session: aiohttp session to send the request with
             origin: Starting location
             destination: Ending location  
             departure_time: When to calculate travel time for (default: now)
@@ -67,44 +284,157 @@ class BusTimetableAnalyzer:
         Returns:
             Travel time in minutes
         """
+        if departure_time is None:
+            departure_time = datetime.now()
+        
+        key = self.cache_key(origin, destination, departure_time)
+        if self.cache is not None:
+            travel_time = self.cache_get(key)
+            self.record_cache_lookup(travel_time is not None)
+            if travel_time is not None:
+                return travel_time
+        
+        return await self.coalesce(key, lambda: self.fetch_travel_time(
+            session, origin, destination, departure_time, key))
+    
+    async def fetch_travel_time(self, session, origin, destination, departure_time, key):
+        """Request a travel time from the Directions API, caching it under key."""
         try:
-            if departure_time is None:
-                departure_time = datetime.now()
-                
-            result = self.gmaps.directions(
-                origin=origin,
-                destination=destination,
-                mode="driving",  # Bus follows driving routes
-                departure_time=departure_time,
-                traffic_model="best_guess"
-            )
+            data = await self.get_json(session, DIRECTIONS_URL, {
+                'origin': origin,
+                'destination': destination,
+                'mode': 'driving',  # Bus follows driving routes
+                'departure_time': int(departure_time.timestamp()),
+                'traffic_model': 'best_guess'
+            })
             
-            if result:
-                duration = result[0]['legs'][0]['duration_in_traffic']['value']
-                return duration / 60  # Convert seconds to minutes
+            if data['routes']:
+                duration = data['routes'][0]['legs'][0]['duration_in_traffic']['value']
+                travel_time = duration / 60  # Convert seconds to minutes
+                if self.cache is not None:
+                    self.cache_put(key, departure_time, travel_time)
+                return travel_time
             else:
-                print(f"No route found from {origin} to {destination}")
+                log.warning("No route found from %s to %s", origin, destination)
                 return None
                 
         except Exception as e:
-            print(f"Error getting directions from {origin} to {destination}: {e}")
+            log.warning("Error getting directions from %s to %s: %s", origin, destination, e)
             return None
     
-    def parse_time(self, time_str):
-        """Parse time string to datetime object."""
-        return datetime.strptime(time_str, "%H:%M").time()
+    async def get_travel_times(self, session, pairs, departure_time=None):
+        """
+        Get travel times for several (origin, destination) pairs concurrently.
+        
+        Args:
+            session: aiohttp session to send the requests with
+            pairs: List of (origin, destination) tuples
+            departure_time: When to calculate travel times for (default: now)
+            
+        Returns:
+            List of travel times in minutes (None on error), in the same
+            order as pairs
+        """
+        if departure_time is None:
+            departure_time = datetime.now()
+        
+        return await asyncio.gather(*(
+            self.get_travel_time(session, origin, destination, departure_time)
+            for origin, destination in pairs
+        ))
+    
+    @staticmethod
+    def fits_in_matrix_request(origins, destinations):
+        """Check a Distance Matrix request is within the API's size limits."""
+        return (len(origins) <= MAX_MATRIX_PLACES and len(destinations) <= MAX_MATRIX_PLACES
+                and len(origins) * len(destinations) <= MAX_MATRIX_ELEMENTS)
+    
+    async def get_travel_time_matrix(self, session, origins, destinations, pairs, departure_time=None):
+        """
+        Get travel times from each origin to each destination with a single
+        Google Distance Matrix API request.
+        
+        The API bills every origin x destination element, so keep both lists
+        as short as possible.
+        
+        Args:
+            session: aiohttp session to send the request with
+            origins: List of starting locations
+            destinations: List of ending locations
+            pairs: (origin index, destination index) pairs the caller needs;
+                if all of them are cached no request is made
+            departure_time: When to calculate travel times for (default: now)
+            
+        Returns:
+            Dict mapping (origin index, destination index) to travel time in
+            minutes, for the pairs that could be routed
+            
+        Raises:
+            ValueError: If the matrix is too big for one request
+        """
+        if not self.fits_in_matrix_request(origins, destinations):
+            raise ValueError(f"{len(origins)} x {len(destinations)} matrix exceeds the "
+                             f"Distance Matrix API limits")
+        if departure_time is None:
+            departure_time = datetime.now()
+        
+        if self.cache is not None:
+            cached = {
+                (a, b): self.cache_get(self.cache_key(origins[a], destinations[b], departure_time))
+                for a, b in pairs
+            }
+            hit = None not in cached.values()
+            self.record_cache_lookup(hit)
+            if hit:
+                return cached
+        
+        key = ('matrix', tuple(origins), tuple(destinations), self.departure_bucket(departure_time))
+        return await self.coalesce(key, lambda: self.fetch_travel_time_matrix(
+            session, origins, destinations, departure_time))
     
-    def time_to_minutes(self, time_obj):
-        """Convert time object to minutes since midnight."""
-        return time_obj.hour * 60 + time_obj.minute
+    async def fetch_travel_time_matrix(self, session, origins, destinations, departure_time):
+        """Request a travel time matrix from the Distance Matrix API and cache it."""
+        try:
+            result = await self.get_json(session, DISTANCE_MATRIX_URL, {
+                'origins': '|'.join(origins),
+                'destinations': '|'.join(destinations),
+                'mode': 'driving',  # Bus follows driving routes
+                'departure_time': int(departure_time.timestamp()),
+                'traffic_model': 'best_guess'
+            })
+        except Exception as e:
+            log.warning("Error getting distance matrix: %s", e)
+            return {}
+        
+        travel_times = {}
+        for a, row in enumerate(result['rows']):
+            for b, element in enumerate(row['elements']):
+                if (origins[a] != destinations[b] and element['status'] == 'OK'
+                        and 'duration_in_traffic' in element):
+                    travel_times[(a, b)] = element['duration_in_traffic']['value'] / 60
+        
+        if self.cache is not None:
+            for (a, b), travel_time in travel_times.items():
+                key = self.cache_key(origins[a], destinations[b], departure_time)
+                self.cache_put(key, departure_time, travel_time)
+        return travel_times
+    
+    @staticmethod
+    def hhmm_to_min(time_str):
+        """Convert an "HH:MM" time string to minutes since midnight."""
+        return int(time_str[:2]) * 60 + int(time_str[3:5])
     
-    def minutes_to_time_str(self, minutes):
+    @staticmethod
+    def minutes_to_time_str(minutes):
         """Convert minutes since midnight to time string."""
-        hours = int(minutes // 60)
-        mins = int(minutes % 60)
+        hours, mins = divmod(int(minutes), 60)
         return f"{hours:02d}:{mins:02d}"
     
     def predict_route_times(self, stops, timetable):
+        """Synchronous wrapper around predict_route_times_async."""
+        return asyncio.run(self.predict_route_times_async(stops, timetable))
+    
+    async def predict_route_times_async(self, stops, timetable):
         """
         Analyze the bus timetable and predict arrival times.
         
@@ -113,13 +443,22 @@ class BusTimetableAnalyzer:
             timetable: List of scheduled times ('x' for no stop)
             
         Returns:
-            DataFrame with analysis results
+            List of result rows (dicts), one per stop
         """
         results = []
+        scheduled_minutes = [self.hhmm_to_min(t) if t != "x" else None for t in timetable]
         
-        # Track the last stop where bus actually stopped
-        last_used_stop = stops[0]
-        last_used_time = self.time_to_minutes(self.parse_time(timetable[0]))
+        # Index of the last scheduled stop before each stop (-1 if none)
+        prev_scheduled = [-1] * len(stops)
+        last = -1
+        for k, minutes in enumerate(scheduled_minutes):
+            prev_scheduled[k] = last
+            if minutes is not None:
+                last = k
+        
+        # Track the index of the last stop where bus actually stopped
+        last_used_idx = 0
+        last_used_time = scheduled_minutes[0]
         
         # Start with the first stop
         results.append({
@@ -129,94 +468,122 @@ class BusTimetableAnalyzer:
             'Predicted Arrival': timetable[0]
         })
         
-        print("Calculating travel times between stops...")
+        log.debug("Calculating travel times between stops...")
         
-        # Process all remaining stops
-        for i in range(1, len(stops)):
-            current_stop = stops[i]
-            scheduled_time = timetable[i]
+        # Which stops the bus stops at is fixed by the timetable, so fetch the
+        # travel times between them up front in one matrix request: every
+        # stopping point but the last to every one but the first covers the
+        # consecutive pairs, and the pairs needed if a stop has to be skipped.
+        # Travel times are keyed by (from stop index, to stop index)
+        stopping = [i for i in range(len(stops)) if scheduled_minutes[i] is not None]
+        consecutive = list(zip(stopping, stopping[1:]))
+        origins, destinations = stopping[:-1], stopping[1:]
+        departure_time = datetime.now()
+        async with self.open_session() as session:
+            travel_times = {}
+            if consecutive and self.fits_in_matrix_request(origins, destinations):
+                matrix = await self.get_travel_time_matrix(
+                    session,
+                    [stops[i] for i in origins],
+                    [stops[i] for i in destinations],
+                    [(k, k) for k in range(len(consecutive))],
+                    departure_time)
+                travel_times = {(origins[a], destinations[b]): t for (a, b), t in matrix.items()}
             
-            if scheduled_time != "x":
-                # Bus stops here - calculate proper analysis
-                print(f"Analyzing: {current_stop}")
-                
-                # Get travel time from last used stop to current stop
-                travel_time = self.get_travel_time(last_used_stop, current_stop)
-                
-                if travel_time is None:
-                    print(f"Skipping {current_stop} due to API error")
-                    continue
-                
-                # Calculate predicted arrival time
-                predicted_time = last_used_time + travel_time
-                
-                scheduled_time_obj = self.parse_time(scheduled_time)
-                scheduled_time_minutes = self.time_to_minutes(scheduled_time_obj)
-                
-                # If bus arrives early, it waits until scheduled time
-                actual_arrival = max(predicted_time, scheduled_time_minutes)
-                
-                # Calculate extra traffic delay
-                # Find the last scheduled stop to compare travel times
-                last_scheduled_time = None
-                for j in range(i-1, -1, -1):
-                    if timetable[j] != "x":
-                        last_scheduled_time = self.time_to_minutes(self.parse_time(timetable[j]))
-                        break
+            # Fall back to Directions for consecutive pairs the matrix didn't cover
+            missing = [pair for pair in consecutive if pair not in travel_times]
+            travel_times.update(zip(missing, await self.get_travel_times(
+                session, [(stops[a], stops[b]) for a, b in missing], departure_time)))
+            
+            # Process all remaining stops
+            for i in range(1, len(stops)):
+                current_stop = stops[i]
+                scheduled_time = timetable[i]
                 
-                if last_scheduled_time is not None:
-                    scheduled_travel = scheduled_time_minutes - last_scheduled_time
-                    actual_travel = actual_arrival - last_used_time
-                    extra_traffic = max(0, actual_travel - scheduled_travel)
+                if scheduled_time != "x":
+                    # Bus stops here - calculate proper analysis
+                    log.debug("Analyzing: %s", current_stop)
+                    
+                    # Get travel time from last used stop to current stop
+                    pair = (last_used_idx, i)
+                    if pair in travel_times:
+                        travel_time = travel_times[pair]
+                    else:
+                        # An earlier stop was skipped and the matrix couldn't route this pair
+                        travel_time = await self.get_travel_time(
+                            session, stops[last_used_idx], current_stop, departure_time)
+                    
+                    if travel_time is None:
+                        log.warning("Skipping %s due to API error", current_stop)
+                        continue
+                    
+                    # Calculate predicted arrival time
+                    predicted_time = last_used_time + travel_time
+                    
+                    scheduled_time_minutes = scheduled_minutes[i]
+                    
+                    # If bus arrives early, it waits until scheduled time
+                    actual_arrival = max(predicted_time, scheduled_time_minutes)
+                    
+                    # Calculate extra traffic delay
+                    # Compare with the last scheduled stop's travel time
+                    j = prev_scheduled[i]
+                    if j >= 0:
+                        last_scheduled_time = scheduled_minutes[j]
+                        scheduled_travel = scheduled_time_minutes - last_scheduled_time
+                        actual_travel = actual_arrival - last_used_time
+                        extra_traffic = max(0, actual_travel - scheduled_travel)
+                    else:
+                        extra_traffic = 0
+                    
+                    results.append({
+                        'Stop': current_stop,
+                        'Timetable': scheduled_time,
+                        'Extra Traffic (min)': round(extra_traffic, 1),
+                        'Predicted Arrival': self.minutes_to_time_str(actual_arrival)
+                    })
+                    
+                    # Update last used stop since bus stopped here
+                    last_used_idx = i
+                    last_used_time = actual_arrival
+                    
                 else:
-                    extra_traffic = 0
-                
-                results.append({
-                    'Stop': current_stop,
-                    'Timetable': scheduled_time,
-                    'Extra Traffic (min)': round(extra_traffic, 1),
-                    'Predicted Arrival': self.minutes_to_time_str(actual_arrival)
-                })
-                
-                # Update last used stop since bus stopped here
-                last_used_stop = current_stop
-                last_used_time = actual_arrival
-                
-                # Small delay to avoid hitting API rate limits
-                time.sleep(0.2)
-                
-            else:
-                # Bus doesn't stop here - show dashes
-                results.append({
-                    'Stop': current_stop,
-                    'Timetable': "-",
-                    'Extra Traffic (min)': "-",
-                    'Predicted Arrival': "-"
-                })
-                
-                # Don't update last_used_stop since bus didn't stop
-        
-        return pd.DataFrame(results)
+                    # Bus doesn't stop here - show dashes
+                    results.append({
+                        'Stop': current_stop,
+                        'Timetable': "-",
+                        'Extra Traffic (min)': "-",
+                        'Predicted Arrival': "-"
+                    })
+                    
+                    # Don't update last_used_idx since bus didn't stop
+            
+            return results
 
 def main():
     """Main function to run the bus timetable analysis."""
     
-    # Read API key from file
-    key_file_path = os.path.expanduser("~/.gcloud/dcommute-service-account-key.json")
+    parser = argparse.ArgumentParser(description="Oxford to London bus timetable analysis")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="query the Directions API even if a cached travel time exists")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="show progress while calculating travel times")
+    args = parser.parse_args()
+    
+    logging.basicConfig(format="%(message)s")
+    if args.verbose:
+        log.setLevel(logging.DEBUG)
+    
     try:
-        with open(key_file_path, 'r') as f:
-            api_key = f.read().strip()
-    except FileNotFoundError:
-        print(f"ERROR: API key file not found at {key_file_path}")
-        print("Please create this file with your Google Maps API key")
+        api_key = get_api_key()
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        print("Please create this file with your Google Maps API key, or set GOOGLE_MAPS_API_KEY")
         print("\nTo get an API key:")
         print("1. Go to https://console.cloud.google.com/")
         print("2. Enable the Directions API")
         print("3. Create credentials and copy your API key")
         return
-    except Exception as e:
-        print(f"ERROR: Could not read API key file: {e}")
-        return
     
     print("Oxford to London Bus Timetable Analysis")
     print("=" * 50)
@@ -225,11 +592,16 @@ def main():
     print()
     
     # Initialize analyzer
-    analyzer = BusTimetableAnalyzer(api_key)
+    try:
+        analyzer = BusTimetableAnalyzer(api_key, use_cache=not args.no_cache)
+    except Exception as e:
+        print(f"ERROR: Could not open travel time cache: {e}")
+        print("Run with --no-cache to skip it")
+        return
     
     # Run analysis
     try:
-        results = analyzer.predict_route_times(STOPS, TIMETABLE)
+        results = asyncio.run(analyzer.predict_route_times_async(STOPS, TIMETABLE))
         
         # Display results
         print("\nResults:")
@@ -237,22 +609,27 @@ def main():
         print(tabulate(results, headers='keys', tablefmt='grid', floatfmt='.1f'))
         
         # Summary statistics (only for stops where bus actually stops)
-        scheduled_stops = results[results['Timetable'] != '-']
-        if len(scheduled_stops) > 0:
-            total_extra_traffic = scheduled_stops['Extra Traffic (min)'].sum()
-            max_delay = scheduled_stops['Extra Traffic (min)'].max()
+        scheduled_stops = [r for r in results if r['Timetable'] != '-']
+        if scheduled_stops:
+            total_extra_traffic = sum(r['Extra Traffic (min)'] for r in scheduled_stops)
+            max_delay = max(r['Extra Traffic (min)'] for r in scheduled_stops)
             
             print(f"\nSummary:")
             print(f"Total extra traffic delay: {total_extra_traffic:.1f} minutes")
             print(f"Maximum delay at single stop: {max_delay:.1f} minutes")
             
             # Journey analysis
-            first_time = scheduled_stops.iloc[0]['Timetable']
-            last_time = scheduled_stops.iloc[-1]['Predicted Arrival']
+            first_time = scheduled_stops[0]['Timetable']
+            last_time = scheduled_stops[-1]['Predicted Arrival']
             print(f"Journey: {first_time} → {last_time}")
         
+        if analyzer.cache is not None:
+            print(f"Travel time cache: {analyzer.cache_hits} hits, {analyzer.cache_misses} misses")
+        
     except Exception as e:
         print(f"Error during analysis: {e}")
+    finally:
+        analyzer.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
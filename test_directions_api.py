@@ -1,20 +1,18 @@
 #!/usr/bin/env python3
 
+import orjson
 import requests
-import json
-import os
+
+from _api_key import get_api_key
+
+# Reuse one connection (and TLS handshake) across API calls
+SESSION = requests.Session()
 
 def test_google_directions_api():
-    # Read API key from file
-    key_file_path = os.path.expanduser("~/.gcloud/dcommute-service-account-key.json")
     try:
-        with open(key_file_path, 'r') as f:
-            API_KEY = f.read().strip()
-    except FileNotFoundError:
-        print(f"API key file not found: {key_file_path}")
-        return False
-    except Exception as e:
-        print(f"Error reading API key: {e}")
+        API_KEY = get_api_key()
+    except RuntimeError as e:
+        print(e)
         return False
     
     # Victoria Coach Station to Marylebone Town Hall
@@ -35,10 +33,10 @@ def test_google_directions_api():
     
     try:
         print(f"Making API call from '{origin}' to '{destination}'...")
-        response = requests.get(url, params=params)
+        response = SESSION.get(url, params=params)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if data['status'] == 'OK':
                 route = data['routes'][0]